@@ -1,41 +1,212 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import random
+import re
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import httpx
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import (
+    FileResponse,
+    ORJSONResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.background import BackgroundTask
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import uvicorn
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is unavailable on Windows
+    uvloop = None
+
+try:
+    import httptools
+except ImportError:  # pragma: no cover - falls back to the pure-Python h11 parser
+    httptools = None
+
+
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        b"connection",
+        b"keep-alive",
+        b"proxy-authenticate",
+        b"proxy-authorization",
+        b"te",
+        b"trailer",
+        b"transfer-encoding",
+        b"upgrade",
+    }
+)
+
+# Upstream headers never forwarded: hop-by-hop ones, plus the body framing
+# headers that no longer apply once httpx has decoded the payload. Keys are
+# lower-case bytes so they can be checked against raw header names directly.
+STRIPPED_RESPONSE_HEADERS = HOP_BY_HOP_HEADERS | {b"content-length", b"content-encoding"}
+
+# Caller headers passed through to the upstream, as (incoming, outgoing) names.
+FORWARDED_REQUEST_HEADERS = (
+    ("user-agent", "User-Agent"),
+    ("accept", "Accept"),
+    ("accept-language", "Accept-Language"),
+)
+
+# Files served in demo mode: (URL path, path under static_root, media type, no-store).
+# Only these are exposed; static_root is usually the whole repository checkout.
+STATIC_FILES = (
+    ("/feedcycle.html", "feedcycle.html", "text/html; charset=utf-8", True),
+    ("/feedcycle.js", "feedcycle.js", "application/javascript", True),
+    ("/feedcycle.css", "feedcycle.css", "text/css", True),
+    ("/assets/js/pwa.js", "assets/js/pwa.js", "application/javascript", False),
+    ("/assets/js/version.js", "assets/js/version.js", "application/javascript", False),
+    ("/parental.js", "parental.js", "application/javascript", False),
+    ("/manifest.webmanifest", "manifest.webmanifest", "application/manifest+json", False),
+    ("/favicon.ico", "favicon.ico", "image/x-icon", False),
+)
+
+NO_STORE_HEADERS = {"Cache-Control": "no-store"}
+
+# Minimal no-op service worker so the PWA loader stops polling in demo mode.
+SERVICE_WORKER_BODY = (
+    b"self.addEventListener('install',()=>self.skipWaiting());"
+    b"self.addEventListener('activate',evt=>evt.waitUntil(self.clients.claim()));"
+    b"self.addEventListener('fetch',()=>{})"
+)
+
+# Chrome devtools probes this during remote debugging; return empty JSON to avoid 404 noise.
+DEVTOOLS_MANIFEST_BODY = b"{}"
+
+# Fast path for plain http(s)://host[:port]/... targets. The character classes
+# are disjoint, so matching never backtracks; anything else (userinfo, IPv6
+# literals, odd casing) falls back to urlsplit.
+CANONICAL_TARGET = re.compile(r"https?://([^/?#:@\[\]\\\s]+)(?::\d+)?(?:[/?#]|$)")
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# ASGI header names are lower-case bytes.
+ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK = b"access-control-allow-private-network"
+ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK = b"access-control-request-private-network"
+
+# Canned headers for the default allow-all CORS policy. A tuple, because the
+# preflight header list is shared by every response and must not be mutated.
+CORS_ALLOW_ANY_ORIGIN = (b"access-control-allow-origin", b"*")
+CORS_PREFLIGHT_HEADERS = (
+    CORS_ALLOW_ANY_ORIGIN,
+    (b"access-control-allow-methods", b"*"),
+    (b"access-control-allow-headers", b"*"),
+    (b"access-control-max-age", b"600"),
+    (b"content-length", b"0"),
+)
+
+
+def _with_header(
+    headers: Iterable[Tuple[bytes, bytes]], name: bytes, value: bytes
+) -> List[Tuple[bytes, bytes]]:
+    """Return ASGI headers with every ``name`` entry replaced by one ``value``."""
+
+    return [item for item in headers if item[0] != name] + [(name, value)]
+
+
+@dataclass(slots=True, frozen=True)
+class BackoffRecord:
+    """Track why a host is in backoff; the deadline lives in its own map."""
 
-HOP_BY_HOP_HEADERS = {
-    "connection",
-    "keep-alive",
-    "proxy-authenticate",
-    "proxy-authorization",
-    "te",
-    "trailer",
-    "transfer-encoding",
-    "upgrade",
-}
+    attempts: int
+    status: int
 
-ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK = "Access-Control-Allow-Private-Network"
-ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK = "Access-Control-Request-Private-Network"
 
+class FastCORSMiddleware:
+    """Pure ASGI CORS handling for the default allow-any-origin policy.
 
-@dataclass
-class BackoffRecord:
-    """Track a backoff window for a specific host."""
+    Preflights are answered from a canned header list without reaching the
+    app; other cross-origin responses get ``Access-Control-Allow-Origin: *``.
+    """
 
-    until: datetime
-    attempts: int
-    status: int
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        has_origin = False
+        has_request_method = False
+        for key, _ in scope["headers"]:
+            if key == b"origin":
+                has_origin = True
+            elif key == b"access-control-request-method":
+                has_request_method = True
+        if not has_origin:
+            await self.app(scope, receive, send)
+            return
+
+        if has_request_method and scope["method"] == "OPTIONS":
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": CORS_PREFLIGHT_HEADERS,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_origin(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # /raw forwards upstream headers, which may already carry
+                # Allow-Origin; browsers reject a duplicated value.
+                message["headers"] = _with_header(
+                    message.get("headers", ()), *CORS_ALLOW_ANY_ORIGIN
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_origin)
+
+
+class PrivateNetworkMiddleware:
+    """Pure ASGI middleware answering Private Network Access requests."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_private_network(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = _with_header(
+                    message.get("headers", ()),
+                    ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK,
+                    b"true",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_header)
+
+    @staticmethod
+    def _wants_private_network(headers: Iterable[Tuple[bytes, bytes]]) -> bool:
+        for key, value in headers:
+            if key == ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK:
+                return value.strip().lower() == b"true"
+        return False
 
 
 class CorsProxyServer:
@@ -62,42 +233,58 @@ class CorsProxyServer:
         self.long_backoff_statuses = {403, 404, 500}
         self.static_root = (static_root or Path(__file__).resolve().parent).resolve()
         self.serve_static = serve_static
-        self.backoffs: Dict[str, BackoffRecord] = {}
+        self._static_cache: Dict[str, Path] = {}
+        # Deadlines (time.monotonic()) are checked on every request, so keep
+        # them in a flat map; the details are only needed on error paths.
+        self._backoff_until: Dict[str, float] = {}
+        self._backoff_meta: Dict[str, BackoffRecord] = {}
         self.client: Optional[httpx.AsyncClient] = None
+        self._default_fwd_headers: Dict[str, str] = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Accept": "application/rss+xml,application/xml;q=0.9,text/xml;q=0.8,*/*;q=0.7",
+            "Accept-Language": "en-US,en;q=0.9",
+        }
         self.app: Optional[FastAPI] = None
 
     def build_app(self) -> FastAPI:
         """Create and configure the FastAPI application."""
 
-        app = FastAPI(title="corsproxydemo", version="0.1.0")
-        app.add_middleware(
-            CORSMiddleware,
-            allow_origins=self.allow_origins,
-            allow_credentials=True,
-            allow_methods=["*"],
-            allow_headers=["*"],
+        app = FastAPI(
+            title="corsproxydemo",
+            version="0.1.0",
+            default_response_class=ORJSONResponse,
         )
-
-        @app.middleware("http")
-        async def add_private_network_header(request: Request, call_next):
-            response = await call_next(request)
-            self._apply_private_network_header(request, response)
-            return response
+        # FastAPI's built-in handler always encodes error bodies with stdlib json.
+        app.add_exception_handler(StarletteHTTPException, self._http_exception_handler)
+        # Upstream content-encoding is stripped, so feeds would otherwise cross
+        # the CORS hop uncompressed; XML typically shrinks several-fold.
+        app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+        if self.allow_origins == ["*"]:
+            app.add_middleware(FastCORSMiddleware)
+        else:
+            app.add_middleware(
+                CORSMiddleware,
+                allow_origins=self.allow_origins,
+                allow_credentials=True,
+                allow_methods=["*"],
+                allow_headers=["*"],
+            )
+        app.add_middleware(PrivateNetworkMiddleware)
 
         app.add_event_handler("startup", self.startup)
         app.add_event_handler("shutdown", self.shutdown)
-        app.get("/raw")(self.proxy_raw)
+        # Plain Starlette routes: these handlers validate their own input, so
+        # skip FastAPI's dependency resolver and Pydantic query validation.
+        app.add_route("/raw", self.proxy_raw, methods=["GET"], include_in_schema=False)
         if self.serve_static:
-            app.get("/", include_in_schema=False)(self.serve_feedcycle_root)
-            app.get("/feedcycle.html", include_in_schema=False)(self.serve_feedcycle_html)
-            app.get("/feedcycle.js", include_in_schema=False)(self.serve_feedcycle_js)
-            app.get("/feedcycle.css", include_in_schema=False)(self.serve_feedcycle_css)
-            app.get("/assets/js/pwa.js", include_in_schema=False)(self.serve_pwa_js)
-            app.get("/assets/js/version.js", include_in_schema=False)(self.serve_version_js)
-            app.get("/parental.js", include_in_schema=False)(self.serve_parental_js)
-            app.get("/manifest.webmanifest", include_in_schema=False)(self.serve_manifest)
-            app.get("/favicon.ico", include_in_schema=False)(self.serve_favicon)
-            app.add_api_route(
+            app.add_route("/", self.serve_feedcycle_root, include_in_schema=False)
+            for url_path, filename, media_type, no_store in STATIC_FILES:
+                app.add_route(
+                    url_path,
+                    self._static_endpoint(filename, media_type, no_store=no_store),
+                    include_in_schema=False,
+                )
+            app.add_route(
                 "/sw.js",
                 self.serve_service_worker,
                 methods=["GET", "HEAD"],
@@ -108,18 +295,34 @@ class CorsProxyServer:
                 StaticFiles(directory=str(self.static_root / "assets" / "appicons")),
                 name="appicons",
             )
-            app.get(
+            app.add_route(
                 "/.well-known/appspecific/com.chrome.devtools.json",
+                self.serve_devtools_manifest,
                 include_in_schema=False,
-            )(self.serve_devtools_manifest)
+            )
         self.app = app
         return app
 
     async def startup(self) -> None:
         """Instantiate the HTTP client."""
 
+        # Feeds are polled from a small set of hosts; keep connections warm so
+        # repeat requests skip the TCP/TLS handshake, and multiplex concurrent
+        # requests over HTTP/2 where the origin supports it.
         self.client = httpx.AsyncClient(
-            timeout=self.upstream_timeout, follow_redirects=True
+            http2=True,
+            timeout=httpx.Timeout(
+                connect=5.0,
+                read=self.upstream_timeout,
+                write=5.0,
+                pool=30.0,
+            ),
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=100,
+                keepalive_expiry=120.0,
+            ),
+            follow_redirects=True,
         )
 
     async def shutdown(self) -> None:
@@ -129,135 +332,162 @@ class CorsProxyServer:
             await self.client.aclose()
             self.client = None
 
-    def _now(self) -> datetime:
-        return datetime.now(timezone.utc)
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _split(raw_url: str) -> Tuple[str, str, str]:
+        # Polled feeds hit the same URLs repeatedly; cache the parse.
+        parts = urlsplit(raw_url)
+        return parts.scheme, parts.hostname or "", parts.geturl()
 
-    def _parse_target(self, raw_url: str) -> str:
+    def _parse_target(self, raw_url: str) -> Tuple[str, str]:
         if not raw_url:
             raise HTTPException(status_code=400, detail="Missing url parameter")
-        target = httpx.URL(raw_url)
-        if target.scheme not in ("http", "https") or not target.host:
+        match = CANONICAL_TARGET.match(raw_url)
+        if match:
+            return raw_url, match.group(1).lower()
+        try:
+            scheme, host, target = self._split(raw_url)
+        except ValueError:
+            scheme, host, target = "", "", raw_url
+        if scheme not in ("http", "https") or not host:
             raise HTTPException(
                 status_code=400,
                 detail="Only absolute http(s) URLs with a host are allowed",
             )
-        return str(target)
-
-    def _host_key(self, target: str) -> str:
-        parsed = httpx.URL(target)
-        if not parsed.host:
-            raise HTTPException(status_code=400, detail="Target host is required")
-        return parsed.host
+        return target, host
 
     def _active_backoff(self, host: str) -> Optional[int]:
-        record = self.backoffs.get(host)
-        if not record:
+        deadline = self._backoff_until.get(host)
+        if deadline is None:
             return None
-        now = self._now()
-        if record.until <= now:
-            self.backoffs.pop(host, None)
+        now = time.monotonic()
+        if deadline <= now:
+            self._clear_backoff(host)
             return None
-        return int((record.until - now).total_seconds())
+        return int(deadline - now)
 
     def _register_backoff(
         self, host: str, status_code: int, retry_after_header: Optional[str]
     ) -> int:
-        now = self._now()
-        retry_after_header = retry_after_header or None
+        # Retry-After is either delay-seconds or an HTTP-date (RFC 9110).
+        retry_after_header = (retry_after_header or "").strip()
         retry_after = None
-        if retry_after_header:
+        # The value is upstream-controlled: isdigit() alone accepts non-ASCII
+        # digits such as "\xb2", and int() rejects very long digit strings.
+        if retry_after_header.isascii() and retry_after_header.isdigit():
             try:
-                retry_after = int(float(retry_after_header))
+                retry_after = int(retry_after_header)
             except ValueError:
                 retry_after = None
+        elif retry_after_header:
+            try:
+                retry_at = parsedate_to_datetime(retry_after_header)
+            except (TypeError, ValueError):
+                retry_at = None
+            if retry_at is not None:
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                retry_after = max(0, int(retry_at.timestamp() - time.time()))
 
         if status_code in self.long_backoff_statuses:
             attempts = 1
             delay = self.long_backoff_seconds
         else:
-            prior = self.backoffs.get(host)
+            prior = self._backoff_meta.get(host)
             attempts = (prior.attempts if prior else 0) + 1
             delay = min(
-                self.backoff_base_seconds * (2 ** (attempts - 1)),
+                self.backoff_base_seconds * (1 << (attempts - 1)),
                 self.backoff_max_seconds,
             )
+            # Jitter so clients behind the proxy do not all retry in lockstep.
+            delay += random.uniform(0, min(delay * 0.25, 5.0))
 
         if retry_after is not None:
             delay = max(delay, retry_after)
 
-        until = now + timedelta(seconds=delay)
-        self.backoffs[host] = BackoffRecord(
-            until=until, attempts=attempts, status=status_code
-        )
+        self._backoff_until[host] = time.monotonic() + delay
+        self._backoff_meta[host] = BackoffRecord(attempts=attempts, status=status_code)
         return int(delay)
 
     def _clear_backoff(self, host: str) -> None:
-        self.backoffs.pop(host, None)
-
-    def _wants_private_network(self, request: Request) -> bool:
-        return (
-            request.headers.get(ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK, "")
-            .lower()
-            .strip()
-            == "true"
+        self._backoff_until.pop(host, None)
+        self._backoff_meta.pop(host, None)
+
+    async def _http_exception_handler(
+        self, request: Request, exc: StarletteHTTPException
+    ) -> Response:
+        headers = getattr(exc, "headers", None)
+        if not is_body_allowed_for_status_code(exc.status_code):
+            return Response(status_code=exc.status_code, headers=headers)
+        return ORJSONResponse(
+            {"detail": exc.detail}, status_code=exc.status_code, headers=headers
         )
 
-    def _apply_private_network_header(self, request: Request, response: Response) -> None:
-        if self._wants_private_network(request):
-            response.headers[ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK] = "true"
-
-    def _file_response(self, filename: str, media_type: str, *, no_store: bool = False) -> FileResponse:
-        path = self.static_root.joinpath(filename)
-        if not path.is_file():
-            raise HTTPException(status_code=404, detail=f"Missing {filename}")
-        headers = {"Cache-Control": "no-store"} if no_store else None
+    def _file_response(
+        self, filename: str, media_type: str, headers: Optional[Dict[str, str]] = None
+    ) -> FileResponse:
+        # Demo assets do not vanish at runtime; only stat each one once.
+        path = self._static_cache.get(filename)
+        if path is None:
+            path = self.static_root.joinpath(filename)
+            if not path.is_file():
+                raise HTTPException(status_code=404, detail=f"Missing {filename}")
+            self._static_cache[filename] = path
         return FileResponse(path, media_type=media_type, headers=headers)
 
-    async def serve_feedcycle_root(self) -> RedirectResponse:
-        return RedirectResponse(url="/feedcycle.html")
-
-    async def serve_feedcycle_html(self) -> FileResponse:
-        return self._file_response("feedcycle.html", "text/html; charset=utf-8", no_store=True)
-
-    async def serve_feedcycle_js(self) -> FileResponse:
-        return self._file_response("feedcycle.js", "application/javascript", no_store=True)
+    def _static_endpoint(
+        self, filename: str, media_type: str, *, no_store: bool = False
+    ) -> Callable[[Request], Awaitable[FileResponse]]:
+        headers = NO_STORE_HEADERS if no_store else None
 
-    async def serve_feedcycle_css(self) -> FileResponse:
-        return self._file_response("feedcycle.css", "text/css", no_store=True)
+        async def endpoint(request: Request) -> FileResponse:
+            return self._file_response(filename, media_type, headers)
 
-    async def serve_pwa_js(self) -> FileResponse:
-        return self._file_response("assets/js/pwa.js", "application/javascript")
+        return endpoint
 
-    async def serve_version_js(self) -> FileResponse:
-        return self._file_response("assets/js/version.js", "application/javascript")
-
-    async def serve_parental_js(self) -> FileResponse:
-        return self._file_response("parental.js", "application/javascript")
-
-    async def serve_manifest(self) -> FileResponse:
-        return self._file_response("manifest.webmanifest", "application/manifest+json")
-
-    async def serve_favicon(self) -> FileResponse:
-        return self._file_response("favicon.ico", "image/x-icon")
+    async def serve_feedcycle_root(self, request: Request) -> RedirectResponse:
+        return RedirectResponse(url="/feedcycle.html")
 
-    async def serve_service_worker(self) -> Response:
-        # Minimal no-op service worker so the PWA loader stops polling in demo mode.
-        body = "self.addEventListener('install',()=>self.skipWaiting());self.addEventListener('activate',evt=>evt.waitUntil(self.clients.claim()));self.addEventListener('fetch',()=>{})"
+    async def serve_service_worker(self, request: Request) -> Response:
         return Response(
-            content=body,
+            content=SERVICE_WORKER_BODY,
             media_type="application/javascript",
-            headers={"Cache-Control": "no-store"},
+            headers=NO_STORE_HEADERS,
         )
 
-    async def serve_devtools_manifest(self) -> Response:
-        # Chrome devtools probes this during remote debugging; return empty JSON to avoid 404 noise.
-        return Response(content="{}", media_type="application/json", headers={"Cache-Control": "no-store"})
+    async def serve_devtools_manifest(self, request: Request) -> Response:
+        return Response(
+            content=DEVTOOLS_MANIFEST_BODY,
+            media_type="application/json",
+            headers=NO_STORE_HEADERS,
+        )
 
-    async def proxy_raw(self, request: Request, url: str) -> Response:  # type: ignore[override]
+    async def _stream_body(
+        self, upstream: httpx.Response, host_key: str
+    ) -> AsyncIterator[bytes]:
+        # Forward decoded chunks as they arrive; content-encoding is stripped
+        # from the outbound headers, so aiter_raw() is not an option here.
+        try:
+            async for chunk in upstream.aiter_bytes(STREAM_CHUNK_SIZE):
+                yield chunk
+        except httpx.RequestError:
+            # Status and headers are already sent, so the body just ends early,
+            # but the host is still backed off like a failed connection.
+            self._register_backoff(host_key, 503, None)
+        finally:
+            await upstream.aclose()
+
+    async def proxy_raw(self, request: Request) -> Response:
         """Proxy the upstream request for the given URL."""
 
-        target = self._parse_target(url)
-        host_key = self._host_key(target)
+        # Starlette routes accept HEAD alongside GET; proxying one would fetch the
+        # whole upstream body just to discard it, and could touch the backoff.
+        if request.method != "GET":
+            raise HTTPException(
+                status_code=405, detail="Method Not Allowed", headers={"Allow": "GET"}
+            )
+
+        target, host_key = self._parse_target(request.query_params.get("url", ""))
 
         wait = self._active_backoff(host_key)
         if wait:
@@ -271,19 +501,16 @@ class CorsProxyServer:
             raise RuntimeError("HTTP client not initialised")
 
         # Preserve caller identity where possible; some hosts 403 non-browser UA.
-        ua = request.headers.get("user-agent") or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        accept = request.headers.get("accept") or "application/rss+xml,application/xml;q=0.9,text/xml;q=0.8,*/*;q=0.7"
-        accept_lang = request.headers.get("accept-language") or "en-US,en;q=0.9"
-        referer = request.headers.get("referer") or target
+        fwd = dict(self._default_fwd_headers)
+        for key_lc, key_out in FORWARDED_REQUEST_HEADERS:
+            value = request.headers.get(key_lc)
+            if value:
+                fwd[key_out] = value
+        fwd["Referer"] = request.headers.get("referer") or target
         try:
-            upstream = await self.client.get(
-                target,
-                headers={
-                    "User-Agent": ua,
-                    "Accept": accept,
-                    "Accept-Language": accept_lang,
-                    "Referer": referer,
-                },
+            upstream = await self.client.send(
+                self.client.build_request("GET", target, headers=fwd),
+                stream=True,
             )
         except httpx.RequestError as exc:
             delay = self._register_backoff(host_key, 503, None)
@@ -292,27 +519,42 @@ class CorsProxyServer:
                 detail=f"Upstream connection failed: {exc}",
                 headers={"Retry-After": str(delay)},
             ) from exc
-        status = upstream.status_code
-        headers = {
-            k: v
-            for k, v in upstream.headers.items()
-            if k.lower() not in HOP_BY_HOP_HEADERS
-        }
-        headers.pop("content-length", None)
-        headers.pop("content-encoding", None)
-
-        if status == 429 or status in self.long_backoff_statuses:
-            delay = self._register_backoff(host_key, status, headers.get("Retry-After"))
-            headers["Retry-After"] = str(delay)
-        else:
-            self._clear_backoff(host_key)
-
-        return Response(
-            content=upstream.content,
-            status_code=status,
-            headers=headers,
-            media_type=upstream.headers.get("content-type"),
-        )
+        # From here on nothing else owns the streamed upstream response, so
+        # release its pooled connection if anything fails before handing off.
+        try:
+            status = upstream.status_code
+            # Forward the filtered upstream headers as the ASGI header list in
+            # one pass; this also keeps repeated headers such as Set-Cookie
+            # intact. httpx keeps upstream casing in .raw and ASGI wants
+            # lower-case names, so this pays one bytes.lower() per header.
+            raw_headers = []
+            for key, value in upstream.headers.raw:
+                key = key.lower()
+                if key not in STRIPPED_RESPONSE_HEADERS:
+                    raw_headers.append((key, value))
+
+            if status == 429 or status in self.long_backoff_statuses:
+                delay = self._register_backoff(
+                    host_key, status, upstream.headers.get("retry-after")
+                )
+                raw_headers = _with_header(
+                    raw_headers, b"retry-after", str(delay).encode("latin-1")
+                )
+            else:
+                self._clear_backoff(host_key)
+
+            response = StreamingResponse(
+                self._stream_body(upstream, host_key),
+                status_code=status,
+                # Runs even if the body is never iterated (e.g. the client
+                # disconnects first); aclose() is idempotent.
+                background=BackgroundTask(upstream.aclose),
+            )
+            response.raw_headers = raw_headers
+            return response
+        except BaseException:
+            await upstream.aclose()
+            raise
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -404,11 +646,40 @@ def main() -> None:
         f"client_url={client_url if not args.no_static else 'static-disabled'}",
     )
 
-    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        loop="uvloop" if uvloop else "asyncio",
+        http="httptools" if httptools else "h11",
+        interface="asgi3",
+    )
+
+
+_default_app: Optional[FastAPI] = None
+
+
+def get_app() -> FastAPI:
+    """Return the default app for uvicorn module loading, building it once."""
+
+    global _default_app
+    if _default_app is None:
+        # Only processes that actually load `corsproxydemo:app` (e.g. externally
+        # spawned gunicorn workers) get the process-wide uvloop policy; merely
+        # importing the module leaves the event loop policy alone.
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        _default_app = CorsProxyServer().build_app()
+    return _default_app
 
 
-# Default app for uvicorn module loading
-app = CorsProxyServer().build_app()
+def __getattr__(name: str) -> FastAPI:
+    # Build `corsproxydemo:app` lazily so running the script does not also
+    # construct an unused second app.
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
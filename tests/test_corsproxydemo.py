@@ -0,0 +1,166 @@
+"""Regression tests for corsproxydemo.py (run with `python -m unittest`)."""
+
+import sys
+import time
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+import httpx
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import corsproxydemo  # noqa: E402
+
+
+class CorsProxyTestCase(unittest.TestCase):
+    """Run the app against a mocked upstream returning ``upstream_headers``."""
+
+    upstream_headers: Mapping[str, str] = MappingProxyType({})
+
+    def setUp(self) -> None:
+        self.server = corsproxydemo.CorsProxyServer(serve_static=False)
+        self.client = TestClient(self.server.build_app())
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+        self.server.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self.upstream)
+        )
+
+    def upstream(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "application/rss+xml", **self.upstream_headers},
+            content=b"<rss/>",
+        )
+
+    def get_raw(self, **headers: str) -> httpx.Response:
+        return self.client.get(
+            "/raw", params={"url": "https://feeds.example.com/rss"}, headers=headers
+        )
+
+
+class UpstreamCorsHeaderTests(CorsProxyTestCase):
+    upstream_headers = {"Access-Control-Allow-Origin": "*"}
+
+    def test_allow_origin_is_not_duplicated(self) -> None:
+        response = self.get_raw(Origin="http://localhost")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.headers.get_list("access-control-allow-origin"), ["*"]
+        )
+
+
+class RawMethodTests(CorsProxyTestCase):
+    def upstream(self, request: httpx.Request) -> httpx.Response:
+        self.fail("HEAD must not reach the upstream")
+
+    def test_head_is_rejected_without_fetching(self) -> None:
+        response = self.client.head(
+            "/raw", params={"url": "https://feeds.example.com/rss"}
+        )
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.headers["allow"], "GET")
+
+
+class UpstreamPrivateNetworkHeaderTests(CorsProxyTestCase):
+    upstream_headers = {"Access-Control-Allow-Private-Network": "false"}
+
+    def test_allow_private_network_is_replaced(self) -> None:
+        response = self.get_raw(**{"Access-Control-Request-Private-Network": "true"})
+        self.assertEqual(
+            response.headers.get_list("access-control-allow-private-network"),
+            ["true"],
+        )
+
+
+class TrackedStream(httpx.AsyncByteStream):
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def __aiter__(self):
+        yield b"<rss/>"
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class UpstreamCleanupTests(CorsProxyTestCase):
+    def upstream(self, request: httpx.Request) -> httpx.Response:
+        self.stream = TrackedStream()
+        return httpx.Response(429, stream=self.stream)
+
+    def test_upstream_closed_after_streaming(self) -> None:
+        response = self.get_raw()
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(self.stream.closed)
+
+    def test_upstream_closed_when_proxy_fails_before_streaming(self) -> None:
+        def fail(*args: object) -> int:
+            raise RuntimeError("boom")
+
+        self.server._register_backoff = fail
+        with self.assertRaises(RuntimeError):
+            self.get_raw()
+        self.assertTrue(self.stream.closed)
+
+
+class FailingStream(TrackedStream):
+    async def __aiter__(self):
+        yield b"<rss>"
+        raise httpx.ReadTimeout("upstream stalled")
+
+
+class UpstreamMidBodyFailureTests(CorsProxyTestCase):
+    def upstream(self, request: httpx.Request) -> httpx.Response:
+        self.stream = FailingStream()
+        return httpx.Response(200, stream=self.stream)
+
+    def test_failure_after_headers_ends_body_and_backs_off(self) -> None:
+        response = self.get_raw()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.stream.closed)
+        self.assertIn("feeds.example.com", self.server._backoff_until)
+
+
+class RetryAfterParsingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = corsproxydemo.CorsProxyServer(backoff_base_seconds=30)
+
+    def test_integer_seconds_extend_the_delay(self) -> None:
+        self.assertEqual(self.server._register_backoff("h", 429, " 120 "), 120)
+
+    def test_malformed_values_fall_back_to_base_delay(self) -> None:
+        for value in ("\xb2", "9" * 5000, "soon", "1.5"):
+            with self.subTest(value=value[:10]):
+                self.server._clear_backoff("h")
+                delay = self.server._register_backoff("h", 429, value)
+                self.assertGreaterEqual(delay, 30)
+                self.assertLess(delay, 36)
+
+    def test_future_http_date_extends_the_delay(self) -> None:
+        delay = self.server._register_backoff(
+            "h", 429, "Wed, 21 Oct 2099 07:28:00 GMT"
+        )
+        self.assertGreater(delay, 3600)
+
+    def test_past_http_date_falls_back_to_base_delay(self) -> None:
+        delay = self.server._register_backoff(
+            "h", 429, "Wed, 21 Oct 2015 07:28:00 GMT"
+        )
+        self.assertGreaterEqual(delay, 30)
+        self.assertLess(delay, 36)
+
+    def test_zoneless_http_date_is_treated_as_utc(self) -> None:
+        retry_at = time.time() + 3600
+        delay = self.server._register_backoff(
+            "h", 429, formatdate(retry_at).replace("+0000", "-0000")
+        )
+        self.assertAlmostEqual(delay, 3600, delta=5)
+
+
+if __name__ == "__main__":
+    unittest.main()